@@ -1,34 +1,68 @@
 """
-Convert Oklahoma election CSV files to the JSON format required by the map.
+Convert state election CSV files to the JSON format required by the map.
 
 This script processes election data from various CSV formats and creates
 a standardized JSON file for the interactive map with competitiveness categorization.
+Each state is described by a config in config/states/ (data directory, file
+layouts, county aliases, geometry source and output path).
+
+Usage:
+    python create_county_results_json.py
+    python create_county_results_json.py config/states/*.json --workers 4 --summary build_summary.json
 """
 
+import argparse
+import contextlib
 import csv
+import hashlib
+import io
 import json
+import operator
 import os
+import sys
+import time
+import traceback
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import re
+import struct
 from datetime import datetime
 
 def clean_number(value):
     """Remove commas and quotes from number strings and convert to int."""
     if isinstance(value, str):
+        # Fast path: most vote strings are already plain digits
+        if value.isdecimal():
+            return int(value)
         value = value.replace(',', '').replace('"', '').strip()
     try:
         return int(value)
     except (ValueError, TypeError):
         return 0
 
-def normalize_county_name(county):
-    """Normalize county name to UPPERCASE and handle special cases."""
+def normalize_county_name(county, aliases=None):
+    """
+    Normalize county name to UPPERCASE and apply the state's county aliases.
+    Alias keys are uppercase names with spaces and a trailing "COUNTY" removed,
+    so {"LEFLORE": "LE FLORE"} maps "Leflore", "Le Flore" and "LeFlore County"
+    to the geometry spelling. Other variants (e.g. "LEFLORE CO.") need their
+    own alias; the name is otherwise returned unchanged.
+    """
     normalized = county.strip().upper()
-    # Handle Le Flore County - ensure it matches GeoJSON spelling "LE FLORE" with space
-    if 'LEFLORE' in normalized.replace(' ', ''):
-        normalized = 'LE FLORE'
+    if aliases:
+        key = normalized.replace(' ', '')
+        if key.endswith('COUNTY'):
+            key = key[:-len('COUNTY')]
+        normalized = aliases.get(key, normalized)
     return normalized
 
+# Key used in reported totals for a file's overall TOTAL VOTES figure
+TOTAL_VOTES = 'TOTAL VOTES'
+
+def is_total_row(county):
+    """True for statewide total rows such as "STATE TOTAL:" or "TOTAL"."""
+    return 'TOTAL' in county.upper()
+
 def get_competitiveness_category(margin_pct, winner):
     """
     Determine competitiveness category based on margin percentage.
@@ -148,10 +182,11 @@ def process_county_results(county, candidates, year, contest_name):
         "all_parties": all_parties
     }
 
-def parse_old_format_csv(filepath, year, office_name):
+def parse_old_format_csv(filepath, year, office_name, county_aliases=None, reported_totals=None):
     """
     Parse old format CSV files (00pres.csv, 02gov.csv, 02ltgov.csv, 02ussen.csv).
-    These have candidates in column headers.
+    These have candidates in column headers. If reported_totals is given, the
+    STATE TOTAL row is recorded there as {office: {candidate: votes}}.
     """
     results = {}
     with open(filepath, 'r', encoding='utf-8') as f:
@@ -223,8 +258,10 @@ def parse_old_format_csv(filepath, year, office_name):
             candidate_names = next(csv_reader)
             f_temp.close()
             
-            # For 2002 format, header row has NO county column, starts directly with candidates
-            # Data rows have county in column 0, so candidates are offset by +1
+            # Some 2002 headers start directly with candidates (02gov), others keep an
+            # empty county cell (02ltgov, 02ussen). Data rows always have county in
+            # column 0, so only the former need their candidates offset by +1
+            offset = 1 if candidate_names and candidate_names[0].strip() else 0
             for i in range(len(candidate_names)):
                 if candidate_names[i] and 'TOTAL' not in candidate_names[i].upper():
                     # Extract candidate name and party from format like "JIM INHOFE (R)"
@@ -249,7 +286,7 @@ def parse_old_format_csv(filepath, year, office_name):
                             party = party_abbr
                         
                         candidates_info.append({
-                            'index': i + 1,  # +1 because data rows have county in column 0
+                            'index': i + offset,
                             'name': name,
                             'party': party
                         })
@@ -275,11 +312,22 @@ def parse_old_format_csv(filepath, year, office_name):
             
             county = row_data[0].strip()
             
-            # Skip state total row
-            if 'STATE TOTAL' in county.upper() or 'TOTAL' in county.upper():
+            # State total row: keep the reported figures for reconciliation
+            if is_total_row(county):
+                if reported_totals is not None:
+                    office_totals = reported_totals.setdefault(office_name, {})
+                    for cand_info in candidates_info:
+                        idx = cand_info['index']
+                        if idx < len(row_data):
+                            office_totals[cand_info['name']] = clean_number(row_data[idx])
+                    # TOTAL VOTES is always the last column; comparing it with the sum of
+                    # the candidate columns catches candidates read from the wrong column
+                    fields = [field for field in row_data if field.strip()]
+                    if len(fields) > len(candidates_info) + 1:
+                        office_totals[TOTAL_VOTES] = clean_number(fields[-1])
                 continue
             
-            county = normalize_county_name(county)
+            county = normalize_county_name(county, county_aliases)
             
             # Extract votes for each candidate
             candidates_data = []
@@ -299,94 +347,133 @@ def parse_old_format_csv(filepath, year, office_name):
     
     return results
 
-def parse_2004_2008_format(filepath, year):
+def read_csv_tuples(f, columns):
+    """
+    Read CSV rows as plain tuples of the requested columns.
+    Each column is a header name, or a tuple of names where the first one present
+    in the header is used. Column positions are resolved once from the header;
+    columns missing from the header (or from a short row) read as ''.
+    Blank rows are skipped, as DictReader does.
+    """
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    positions = {name: i for i, name in enumerate(header)}
+    indexes = []
+    for column in columns:
+        names = (column,) if isinstance(column, str) else column
+        indexes.append(next((positions[name] for name in names if name in positions), None))
+
+    if None in indexes or len(indexes) < 2:
+        for row in reader:
+            if row:
+                yield tuple(row[i] if i is not None and i < len(row) else '' for i in indexes)
+        return
+
+    width = max(indexes) + 1
+    getter = operator.itemgetter(*indexes)
+    for row in reader:
+        if len(row) >= width:
+            yield getter(row)
+        elif row:
+            yield tuple(row[i] if i < len(row) else '' for i in indexes)
+
+def read_long_format_rows(filepath, vote_column='votes', county_aliases=None):
+    """
+    Read a long-format results file (one row per county and candidate).
+    Yields (county, is_total, office, candidate, party, votes) tuples with the
+    county normalized, is_total set for statewide total rows, text fields
+    stripped and votes converted to int.
+    """
+    county_cache = {}
+    columns = ('county', 'office', 'candidate', 'party', vote_column)
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for raw_county, office, candidate, party, votes in read_csv_tuples(f, columns):
+            # Normalize and classify each distinct county spelling only once
+            cached = county_cache.get(raw_county)
+            if cached is None:
+                county = normalize_county_name(raw_county, county_aliases)
+                cached = county_cache[raw_county] = (county, is_total_row(county))
+            votes = clean_number(votes)
+            yield cached[0], cached[1], office.strip(), candidate.strip(), party.strip(), votes
+
+def parse_2004_2008_format(filepath, year, county_aliases=None, reported_totals=None):
     """
     Parse 2004-2008 format files (20041102, 20081104).
     Format: county, office, district, candidate, party, votes
+    STATE TOTAL rows are recorded in reported_totals (if given) instead of the results.
     """
     results_by_office = defaultdict(lambda: defaultdict(list))
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            county = normalize_county_name(row.get('county', ''))
-            office = row.get('office', '').strip()
-            candidate = row.get('candidate', '').strip()
-            party = row.get('party', '').strip()
-            votes = clean_number(row.get('votes', 0))
-            
-            if county and candidate and votes > 0:
-                results_by_office[office][county].append({
-                    'candidate': candidate,
-                    'party': party,
-                    'votes': votes
-                })
+    for county, is_total, office, candidate, party, votes in read_long_format_rows(filepath, county_aliases=county_aliases):
+        if county and candidate and votes > 0:
+            if is_total:
+                if reported_totals is not None:
+                    reported_totals.setdefault(office, {})[candidate] = votes
+                continue
+            results_by_office[office][county].append({
+                'candidate': candidate,
+                'party': party,
+                'votes': votes
+            })
     
     return results_by_office
 
-def parse_modern_format(filepath, year):
+def parse_modern_format(filepath, year, county_aliases=None, reported_totals=None):
     """
     Parse modern format files (2012+).
     Format: county, office, candidate, party, votes (with various vote type columns)
+    STATE TOTAL rows are recorded in reported_totals (if given) instead of the results.
     """
     results_by_office = defaultdict(lambda: defaultdict(list))
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            county = normalize_county_name(row.get('county', ''))
-            office = row.get('office', '').strip()
-            candidate = row.get('candidate', '').strip()
-            party = row.get('party', '').strip()
-            votes = clean_number(row.get('votes', 0))
-            
-            if county and candidate and office and votes > 0:
-                results_by_office[office][county].append({
-                    'candidate': candidate,
-                    'party': party,
-                    'votes': votes
-                })
+    for county, is_total, office, candidate, party, votes in read_long_format_rows(filepath, county_aliases=county_aliases):
+        if county and candidate and office and votes > 0:
+            if is_total:
+                if reported_totals is not None:
+                    reported_totals.setdefault(office, {})[candidate] = votes
+                continue
+            results_by_office[office][county].append({
+                'candidate': candidate,
+                'party': party,
+                'votes': votes
+            })
     
     return results_by_office
 
-def parse_precinct_format(filepath, year):
+def parse_precinct_format(filepath, year, county_aliases=None, reported_totals=None):
     """
     Parse precinct-level files and aggregate by county (2010, 2014).
     Format: county, office, candidate, party, precinct, votes/total_votes
+    STATE TOTAL rows are recorded in reported_totals (if given) instead of the results.
     """
     results_by_office = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
     candidate_party_map = {}
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            county = normalize_county_name(row.get('county', ''))
-            office = row.get('office', '').strip()
-            candidate = row.get('candidate', '').strip()
-            party = row.get('party', '').strip()
-            
-            # Handle different vote column names
-            if 'total_votes' in row:
-                votes = clean_number(row.get('total_votes', 0))
-            else:
-                votes = clean_number(row.get('votes', 0))
+    # Handle different vote column names (total_votes preferred over votes)
+    rows = read_long_format_rows(filepath, ('total_votes', 'votes'), county_aliases)
+    
+    for county, is_total, office, candidate, party, votes in rows:
+        if county and candidate and office and votes > 0:
+            # Skip over/under votes and straight party votes
+            candidate_lower = candidate.lower()
+            if 'over votes' in candidate_lower or 'under votes' in candidate_lower:
+                continue
+            if 'straight party' in office.lower():
+                continue
+            if is_total:
+                if reported_totals is not None:
+                    reported_totals.setdefault(office, {})[candidate] = votes
+                continue
             
-            if county and candidate and office and votes > 0:
-                # Skip over/under votes and straight party votes
-                if 'over votes' in candidate.lower() or 'under votes' in candidate.lower():
-                    continue
-                if 'straight party' in office.lower():
-                    continue
-                
-                # Aggregate votes by county
-                key = (county, office, candidate)
-                results_by_office[office][county][candidate] += votes
-                # Store party affiliation
-                if candidate not in candidate_party_map:
-                    candidate_party_map[candidate] = party
+            # Aggregate votes by county
+            results_by_office[office][county][candidate] += votes
+            # Store party affiliation
+            if candidate not in candidate_party_map:
+                candidate_party_map[candidate] = party
     
     # Convert to the expected format
     formatted_results = defaultdict(lambda: defaultdict(list))
@@ -401,6 +488,123 @@ def parse_precinct_format(filepath, year):
     
     return formatted_results
 
+def read_dbf_records(filepath):
+    """
+    Read the attribute table of a shapefile (.dbf) without extra dependencies.
+    Returns a list of dicts keyed by field name with stripped string values.
+    """
+    records = []
+    with open(filepath, 'rb') as f:
+        record_count, header_length, record_length = struct.unpack('<4xIHH20x', f.read(32))
+
+        # Field descriptors are 32 bytes each, terminated by 0x0D
+        fields = []
+        while True:
+            descriptor = f.read(32)
+            if not descriptor or descriptor[0] == 0x0D:
+                break
+            name = descriptor[:11].split(b'\x00')[0].decode('ascii')
+            fields.append((name, descriptor[16]))
+
+        f.seek(header_length)
+        for _ in range(record_count):
+            record = f.read(record_length)
+            if not record or record[0:1] == b'*':  # Deleted record
+                continue
+            offset = 1
+            values = {}
+            for name, length in fields:
+                values[name] = record[offset:offset + length].decode('utf-8', errors='replace').strip()
+                offset += length
+            records.append(values)
+
+    return records
+
+def load_county_fips(geometry_path, county_aliases=None):
+    """
+    Build a county name -> GEOID map from the county geometry source.
+    Accepts the TIGER/Line .dbf or a converted GeoJSON; names are run through
+    normalize_county_name so they match the keys used in the results.
+    """
+    if geometry_path.lower().endswith('.dbf'):
+        rows = read_dbf_records(geometry_path)
+    else:
+        with open(geometry_path, 'r', encoding='utf-8') as f:
+            rows = [feature.get('properties', {}) for feature in json.load(f)['features']]
+
+    county_fips = {}
+    for props in rows:
+        name = props.get('NAME20') or props.get('NAME') or ''
+        geoid = props.get('GEOID20') or props.get('GEOID') or ''
+        if name and geoid:
+            county_fips[normalize_county_name(name, county_aliases)] = geoid
+    return county_fips
+
+def attach_county_fips(results_by_year, county_fips):
+    """
+    Resolve every county in the results to its GEOID.
+    Adds a 'fips' field to each county result and a 'colors_by_fips' map to each
+    contest so the map can color features with a single match expression.
+    Raises ValueError listing any county names that have no geometry.
+    """
+    unmatched = defaultdict(set)
+    for year, categories in results_by_year.items():
+        for category, contests in categories.items():
+            for contest_id, contest_data in contests.items():
+                colors_by_fips = {}
+                for county, county_result in contest_data['results'].items():
+                    fips = county_fips.get(county)
+                    if not fips:
+                        unmatched[county].add(contest_id)
+                        continue
+                    county_result['fips'] = fips
+                    colors_by_fips[fips] = county_result['competitiveness']['color']
+                contest_data['colors_by_fips'] = colors_by_fips
+
+    if unmatched:
+        details = '; '.join(f"{county} ({', '.join(sorted(contests))})"
+                            for county, contests in sorted(unmatched.items()))
+        raise ValueError(f"{len(unmatched)} result counties have no matching geometry: {details}")
+
+def sum_candidate_votes(county_results):
+    """Statewide vote sum per candidate from {county: [candidate dicts]}."""
+    sums = defaultdict(int)
+    for candidates in county_results.values():
+        for c in candidates:
+            sums[c['candidate']] += c['votes']
+    return sums
+
+def reconcile_totals(filename, year, reported_totals, results_by_office, tolerance_pct):
+    """
+    Compare the statewide totals reported in a file with the sum of its county results.
+    Returns one report entry per office and candidate that has a reported total.
+    """
+    entries = []
+    for office, reported in reported_totals.items():
+        counted = sum_candidate_votes(results_by_office.get(office, {}))
+        for candidate, reported_votes in reported.items():
+            if candidate == TOTAL_VOTES:
+                counted_votes = sum(counted.values())
+            else:
+                counted_votes = counted.get(candidate, 0)
+            difference = counted_votes - reported_votes
+            if reported_votes:
+                difference_pct = abs(difference) / reported_votes * 100
+            else:
+                difference_pct = 0.0 if difference == 0 else 100.0
+            entries.append({
+                "file": filename,
+                "year": str(year),
+                "office": office,
+                "candidate": candidate,
+                "reported": reported_votes,
+                "counted": counted_votes,
+                "difference": difference,
+                "difference_pct": round(difference_pct, 3),
+                "within_tolerance": difference_pct <= tolerance_pct
+            })
+    return entries
+
 def create_contest_id(office_name, year):
     """Create a standardized contest ID."""
     # Simplify office name for ID
@@ -408,86 +612,122 @@ def create_contest_id(office_name, year):
     office_clean = re.sub(r'[^a-z0-9_]', '', office_clean)
     return f"{office_clean}_{year}"
 
-def main():
-    data_dir = 'data/Election_Data'
-    output_file = 'data/oklahoma_county_election_results_2008_2024.json'
+# Resolved against this script's directory so the default works from anywhere
+DEFAULT_STATE_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'states', 'oklahoma.json')
+
+# Allowed gap between reported statewide totals and county sums, in percent
+DEFAULT_RECONCILIATION_TOLERANCE_PCT = 0.1
+
+# Config keys holding paths, which are relative to the config file
+CONFIG_PATH_KEYS = ('data_dir', 'geometry_file', 'output_file', 'contest_index_file', 'contest_shard_dir',
+                    'golden_file')
+
+def load_state_config(config_path):
+    """
+    Load a per-state build configuration (see config/states/oklahoma.json).
+    Paths are resolved against the config file's directory, so a build works
+    from any working directory. The 'files' entries are returned as
+    (filename, year, office override, format type) tuples; 'county_aliases'
+    defaults to no aliases.
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    missing = [key for key in ('state', 'state_fips', 'data_dir', 'geometry_file', 'output_file', 'files')
+               if key not in config]
+    if missing:
+        raise ValueError(f"{config_path}: missing required keys: {', '.join(missing)}")
+
+    config_dir = os.path.dirname(config_path)
+    for key in CONFIG_PATH_KEYS:
+        if config.get(key):
+            config[key] = os.path.normpath(os.path.join(config_dir, config[key]))
+
+    config['county_aliases'] = config.get('county_aliases', {})
+    config['files'] = [
+        (entry['file'], entry['year'], entry.get('office'), entry.get('format', 'modern'))
+        for entry in config['files']
+    ]
+    return config
+
+def build_metadata(state, county_fips):
+    """Metadata block of the results JSON for a state config and its county GEOIDs."""
+    return {
+        "state": state['state'],
+        "state_fips": state['state_fips'],
+        "counties_count": len(county_fips),
+        "years_covered": state.get('years_covered', ''),
+        "data_source": state.get('data_source', ''),
+        "focus": "Clean geographic political patterns",
+        "processed_date": datetime.now().strftime("%Y-%m-%d"),
+        "county_fips": county_fips,
+        "categorization_system": {
+            "competitiveness_scale": {
+                "Republican": [
+                    {"category": "Annihilation", "range": "R+40%+", "color": "#67000d"},
+                    {"category": "Dominant", "range": "R+30-40%", "color": "#a50f15"},
+                    {"category": "Stronghold", "range": "R+20-30%", "color": "#cb181d"},
+                    {"category": "Safe", "range": "R+10-20%", "color": "#ef3b2c"},
+                    {"category": "Likely", "range": "R+5.5-10%", "color": "#fb6a4a"},
+                    {"category": "Lean", "range": "R+1-5.5%", "color": "#fcae91"},
+                    {"category": "Tilt", "range": "R+0.5-1%", "color": "#fee8c8"}
+                ],
+                "Tossup": [
+                    {"category": "Tossup", "range": "±0.5%", "color": "#f7f7f7"}
+                ],
+                "Democratic": [
+                    {"category": "Tilt", "range": "D+0.5-1%", "color": "#e1f5fe"},
+                    {"category": "Lean", "range": "D+1-5.5%", "color": "#c6dbef"},
+                    {"category": "Likely", "range": "D+5.5-10%", "color": "#9ecae1"},
+                    {"category": "Safe", "range": "D+10-20%", "color": "#6baed6"},
+                    {"category": "Stronghold", "range": "D+20-30%", "color": "#3182bd"},
+                    {"category": "Dominant", "range": "D+30-40%", "color": "#08519c"},
+                    {"category": "Annihilation", "range": "D+40%+", "color": "#08306b"}
+                ]
+            },
+            "office_types": ["Federal", "State", "Judicial", "Other"],
+            "enhanced_features": [
+                "Competitiveness categorization for each county",
+                "Contest type classification (Federal/State/Judicial)",
+                "Office ranking system for analysis prioritization",
+                "Color coding compatible with political geography visualization"
+            ]
+        }
+    }
+
+# Parser used for each format type in a state's file list
+PARSERS = {
+    'old': parse_old_format_csv,
+    '2004': parse_2004_2008_format,
+    '2008': parse_2004_2008_format,
+    'precinct': parse_precinct_format,
+    'modern': parse_modern_format,
+}
+
+def build_results(state, parsers=PARSERS):
+    """
+    Parse every source file listed in a state config and build the full results
+    structure for the map. parsers maps each format type to its parse function,
+    so alternative implementations can be swapped in and checked against the defaults.
+    """
+    data_dir = state['data_dir']
+    county_aliases = state['county_aliases']
+    tolerance_pct = state.get('reconciliation_tolerance_pct', DEFAULT_RECONCILIATION_TOLERANCE_PCT)
+    reconciliation = []
+    
+    # County name -> GEOID lookup used to key results for the map
+    county_fips = load_county_fips(state['geometry_file'], county_aliases)
     
     # Initialize result structure
     result = {
-        "metadata": {
-            "state": "Oklahoma",
-            "state_fips": "40",
-            "counties_count": 77,
-            "years_covered": "2000-2020",
-            "data_source": "Oklahoma State Election Board",
-            "focus": "Clean geographic political patterns",
-            "processed_date": datetime.now().strftime("%Y-%m-%d"),
-            "categorization_system": {
-                "competitiveness_scale": {
-                    "Republican": [
-                        {"category": "Annihilation", "range": "R+40%+", "color": "#67000d"},
-                        {"category": "Dominant", "range": "R+30-40%", "color": "#a50f15"},
-                        {"category": "Stronghold", "range": "R+20-30%", "color": "#cb181d"},
-                        {"category": "Safe", "range": "R+10-20%", "color": "#ef3b2c"},
-                        {"category": "Likely", "range": "R+5.5-10%", "color": "#fb6a4a"},
-                        {"category": "Lean", "range": "R+1-5.5%", "color": "#fcae91"},
-                        {"category": "Tilt", "range": "R+0.5-1%", "color": "#fee8c8"}
-                    ],
-                    "Tossup": [
-                        {"category": "Tossup", "range": "±0.5%", "color": "#f7f7f7"}
-                    ],
-                    "Democratic": [
-                        {"category": "Tilt", "range": "D+0.5-1%", "color": "#e1f5fe"},
-                        {"category": "Lean", "range": "D+1-5.5%", "color": "#c6dbef"},
-                        {"category": "Likely", "range": "D+5.5-10%", "color": "#9ecae1"},
-                        {"category": "Safe", "range": "D+10-20%", "color": "#6baed6"},
-                        {"category": "Stronghold", "range": "D+20-30%", "color": "#3182bd"},
-                        {"category": "Dominant", "range": "D+30-40%", "color": "#08519c"},
-                        {"category": "Annihilation", "range": "D+40%+", "color": "#08306b"}
-                    ]
-                },
-                "office_types": ["Federal", "State", "Judicial", "Other"],
-                "enhanced_features": [
-                    "Competitiveness categorization for each county",
-                    "Contest type classification (Federal/State/Judicial)",
-                    "Office ranking system for analysis prioritization",
-                    "Color coding compatible with political geography visualization"
-                ]
-            }
-        },
+        "metadata": build_metadata(state, county_fips),
         "results_by_year": {}
     }
     
-    print("Processing Oklahoma election data...")
+    print(f"Processing {state['state']} election data...")
     print("=" * 60)
     
-    # Define file mappings
-    files_to_process = [
-        # Old format
-        ('00pres-aligned.csv', 2000, 'President', 'old'),
-        ('02gov-aligned.csv', 2002, 'Governor', 'old'),
-        ('02ltgov-aligned.csv', 2002, 'Lieutenant Governor', 'old'),
-        ('02ussen-aligned.csv', 2002, 'U.S. Senate', 'old'),
-        
-        # 2004-2008 format
-        ('20041102__ok__general__president.csv', 2004, None, '2004'),
-        ('20041102__ok__general__corp__commissioner__county.csv', 2004, None, '2004'),
-        ('20081104__ok__general__president__county.csv', 2008, None, '2008'),
-        ('20081104__ok__general__us_senate__county.csv', 2008, None, '2008'),
-        ('20081104__ok__general__corp_commissioner__county.csv', 2008, None, '2008'),
-        
-        # Precinct format (needs aggregation)
-        ('20101102__ok__general__precinct.csv', 2010, None, 'precinct'),
-        ('20141104__ok__general__precinct.csv', 2014, None, 'precinct'),
-        
-        # Modern format (2012+)
-        ('20121106__ok__general__county.csv', 2012, None, 'modern'),
-        ('20161108__ok__general__county.csv', 2016, None, 'modern'),
-        ('20181106__ok__general__county.csv', 2018, None, 'modern'),
-        ('20201103__ok__general__county.csv', 2020, None, 'modern'),
-    ]
-    
-    for file_info in files_to_process:
+    for file_info in state['files']:
         filename = file_info[0]
         year = file_info[1]
         office_override = file_info[2] if len(file_info) > 2 else None
@@ -508,7 +748,11 @@ def main():
             
             if format_type == 'old':
                 # Old format - single office per file
-                county_results = parse_old_format_csv(filepath, year, office_override)
+                reported_totals = {}
+                county_results = parsers['old'](filepath, year, office_override, county_aliases,
+                                                reported_totals=reported_totals)
+                reconciliation.extend(reconcile_totals(filename, year, reported_totals,
+                                                       {office_override: county_results}, tolerance_pct))
                 
                 contest_id = create_contest_id(office_override, year)
                 
@@ -554,12 +798,11 @@ def main():
                 
             else:
                 # Modern format (2004+)
-                if format_type in ['2004', '2008']:
-                    results_by_office = parse_2004_2008_format(filepath, year)
-                elif format_type == 'precinct':
-                    results_by_office = parse_precinct_format(filepath, year)
-                else:
-                    results_by_office = parse_modern_format(filepath, year)
+                reported_totals = {}
+                results_by_office = parsers.get(format_type, parsers['modern'])(
+                    filepath, year, county_aliases, reported_totals=reported_totals)
+                reconciliation.extend(reconcile_totals(filename, year, reported_totals,
+                                                       results_by_office, tolerance_pct))
                 
                 # Define partisan offices we want to keep
                 partisan_offices = [
@@ -639,12 +882,41 @@ def main():
         
         except Exception as e:
             print(f"   ✗ Error processing {filename}: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            traceback.print_exc(file=sys.stdout)
             continue
     
-    # Save to JSON
+    # Join every result county to its geometry; unmatched names abort the build
+    attach_county_fips(result['results_by_year'], county_fips)
+    print(f"\n🔗 Joined results to {len(county_fips)} county geometries by FIPS")
+    
+    # County sums vs reported statewide totals; anything past tolerance aborts the build
+    failures = [entry for entry in reconciliation if not entry['within_tolerance']]
+    result['metadata']['reconciliation'] = {
+        "tolerance_pct": tolerance_pct,
+        "checked": len(reconciliation),
+        "failed": len(failures),
+        "entries": reconciliation
+    }
+    print(f"\n🧮 Reconciled {len(reconciliation)} reported statewide totals "
+          f"(tolerance {tolerance_pct}%): {len(failures)} outside tolerance")
+    for entry in reconciliation:
+        mark = '✓' if entry['within_tolerance'] else '✗'
+        print(f"   {mark} {entry['year']} {entry['office'] or entry['file']} - {entry['candidate']}: "
+              f"reported {entry['reported']:,}, counted {entry['counted']:,} ({entry['difference_pct']}%)")
+    if failures:
+        details = '; '.join(f"{e['file']} {e['office']} {e['candidate']} "
+                            f"(reported {e['reported']}, counted {e['counted']})" for e in failures)
+        raise ValueError(f"{len(failures)} statewide totals differ from county sums by more than "
+                         f"{tolerance_pct}%: {details}")
+    
+    return result
+
+def save_results(result, output_file):
+    """Write the results JSON and print a per-contest summary."""
     print(f"\n💾 Saving results to {output_file}...")
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(result, f, indent=2)
     
@@ -665,5 +937,164 @@ def main():
     print(f"\n📊 Output file size: {file_size:.2f} KB")
     print(f"📁 Location: {output_file}")
 
+def results_content_key(result):
+    """
+    Short hash of results_by_year. It is written to the results metadata, the
+    contest index and every contest shard, so the map can tell whether they
+    come from the same build even when two builds share a processed_date.
+    """
+    payload = json.dumps(result['results_by_year'], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def build_contest_index(result):
+    """
+    Small year -> category -> contest id -> display name index of the results,
+    so the map can fill its contest menu before the full results file arrives.
+    """
+    return {
+        "state": result['metadata']['state'],
+        "processed_date": result['metadata']['processed_date'],
+        "content_key": result['metadata']['content_key'],
+        "years": {
+            year: {
+                category: {contest_id: contest['contest_name'] for contest_id, contest in contests.items()}
+                for category, contests in categories.items()
+            }
+            for year, categories in result['results_by_year'].items()
+        }
+    }
+
+def save_contest_index(result, index_file):
+    """Write the contest index next to the results JSON."""
+    contest_index = build_contest_index(result)
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump(contest_index, f, indent=2)
+    contest_count = sum(len(contests) for categories in contest_index['years'].values()
+                        for contests in categories.values())
+    print(f"🗂  Contest index: {index_file} ({contest_count} contests, "
+          f"{os.path.getsize(index_file) / 1024:.2f} KB)")
+
+def contest_shard_path(shard_dir, year, category, contest_id):
+    """Location of one contest's shard: <shard_dir>/<year>/<category>/<contest_id>.json."""
+    return os.path.join(shard_dir, str(year), category, f"{contest_id}.json")
+
+def save_contest_shards(result, shard_dir):
+    """
+    Write one compact file per contest (contest name, county results and
+    colors_by_fips) so the map can color a picked contest before the full
+    results file has loaded.
+    """
+    content_key = result['metadata']['content_key']
+    shard_count = 0
+    total_size = 0
+    for year, categories in result['results_by_year'].items():
+        for category, contests in categories.items():
+            for contest_id, contest in contests.items():
+                shard_file = contest_shard_path(shard_dir, year, category, contest_id)
+                os.makedirs(os.path.dirname(shard_file), exist_ok=True)
+                with open(shard_file, 'w', encoding='utf-8') as f:
+                    json.dump(dict(contest, content_key=content_key, year=year, category=category,
+                                   contest_id=contest_id), f, separators=(',', ':'))
+                shard_count += 1
+                total_size += os.path.getsize(shard_file)
+    print(f"🧩 Contest shards: {shard_dir} ({shard_count} files, "
+          f"{total_size / 1024 / max(shard_count, 1):.2f} KB average)")
+
+def build_state(config_path, quiet=False):
+    """
+    Build and save the results for one state config.
+    Returns a run summary dict. With quiet=True the progress output is captured
+    in the summary's 'log' instead of printed, so worker processes building
+    different states don't interleave their output.
+    """
+    summary = {
+        "config": config_path,
+        "state": None,
+        "output_file": None,
+        "years": [],
+        "contests": 0,
+        "counties": 0,
+        "seconds": 0,
+        "error": None
+    }
+    log = io.StringIO()
+    start = time.perf_counter()
+    
+    with contextlib.redirect_stdout(log) if quiet else contextlib.nullcontext():
+        try:
+            state = load_state_config(config_path)
+            summary["state"] = state['state']
+            summary["output_file"] = state['output_file']
+            
+            result = build_results(state)
+            result['metadata']['content_key'] = results_content_key(result)
+            save_results(result, state['output_file'])
+            if state.get('contest_index_file'):
+                save_contest_index(result, state['contest_index_file'])
+            if state.get('contest_shard_dir'):
+                save_contest_shards(result, state['contest_shard_dir'])
+            
+            results_by_year = result['results_by_year']
+            summary["years"] = sorted(results_by_year)
+            summary["contests"] = sum(len(contests) for categories in results_by_year.values()
+                                      for contests in categories.values())
+            summary["counties"] = result['metadata']['counties_count']
+        except Exception as e:
+            summary["error"] = f"{type(e).__name__}: {e}"
+            print(f"\n✗ Error building {config_path}: {e}")
+            traceback.print_exc(file=sys.stdout)
+    
+    summary["seconds"] = round(time.perf_counter() - start, 2)
+    summary["log"] = log.getvalue()
+    return summary
+
+def print_run_summary(summaries):
+    """Print one line per state for a batch run."""
+    print("\n" + "=" * 60)
+    print(f"🗂  Run summary ({len(summaries)} state{'s' if len(summaries) != 1 else ''})")
+    for summary in summaries:
+        name = summary['state'] or summary['config']
+        if summary['error']:
+            print(f"   ✗ {name}: {summary['error']} ({summary['seconds']}s)")
+        else:
+            years = f"{summary['years'][0]}-{summary['years'][-1]}" if summary['years'] else 'no years'
+            print(f"   ✓ {name}: {summary['contests']} contests, {summary['counties']} counties, "
+                  f"{years} ({summary['seconds']}s) -> {summary['output_file']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build county election results JSON for one or more states.")
+    parser.add_argument('configs', nargs='*', default=[DEFAULT_STATE_CONFIG],
+                        help=f"state config files (default: {DEFAULT_STATE_CONFIG})")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes shared by all states (default: CPU count)")
+    parser.add_argument('--summary', help="also write the combined run summary to this JSON file")
+    args = parser.parse_args()
+    
+    if len(args.configs) == 1:
+        summaries = [build_state(args.configs[0])]
+    else:
+        # One shared pool for every state; each state's log is printed as it finishes
+        summaries = []
+        workers = max(1, min(args.workers, len(args.configs)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(build_state, config_path, True) for config_path in args.configs]
+            for future in as_completed(futures):
+                summary = future.result()
+                print(summary['log'], end='')
+                summaries.append(summary)
+        summaries.sort(key=lambda summary: args.configs.index(summary['config']))
+    
+    print_run_summary(summaries)
+    
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump({
+                "run_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "states": [{k: v for k, v in summary.items() if k != 'log'} for summary in summaries]
+            }, f, indent=2)
+        print(f"📁 Summary: {args.summary}")
+    
+    return 1 if any(summary['error'] for summary in summaries) else 0
+
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
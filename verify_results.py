@@ -0,0 +1,776 @@
+"""
+Differential check of the election results pipeline.
+
+Runs the reference implementation and one or more alternative engines on the
+real files in data/Election_Data and on generated inputs, compares the results
+structurally (ignoring processed_date) and reports per-contest/per-county
+differences along with the speed of each engine relative to the reference.
+On the real files every engine, the reference included, is also compared with
+the checked-in golden output named by the state config's golden_file.
+
+Usage:
+    python verify_results.py
+    python verify_results.py --engine current --repeat 5 --seed 7
+    python verify_results.py --config config/states/oklahoma.json
+    python verify_results.py --update-golden   # after an intended output change
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import traceback
+from collections import defaultdict
+
+import create_county_results_json as pipeline
+
+# Keys that legitimately differ between runs
+IGNORED_PATHS = {('metadata', 'processed_date')}
+
+# ---------------------------------------------------------------------------
+# Reference parsers: the straightforward DictReader versions that defined the
+# published output. Optimized parsers must match these exactly. They are
+# pinned copies: do not change them along with the pipeline's parsers.
+# ---------------------------------------------------------------------------
+
+def reference_normalize_county_name(county, aliases=None):
+    """Uppercase a county name and apply the state's aliases (spaces and a trailing COUNTY ignored)."""
+    normalized = county.strip().upper()
+    if aliases:
+        key = normalized.replace(' ', '')
+        if key.endswith('COUNTY'):
+            key = key[:-len('COUNTY')]
+        normalized = aliases.get(key, normalized)
+    return normalized
+
+def reference_clean_number(value):
+    """Remove commas and quotes from number strings and convert to int."""
+    if isinstance(value, str):
+        value = value.replace(',', '').replace('"', '').strip()
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 0
+
+def reference_parse_old_format_csv(filepath, year, office_name, county_aliases=None, reported_totals=None):
+    """
+    Reference parser for the 2000-2002 files with candidates in column headers.
+    Unlike the long formats it records the STATE TOTAL row itself, since the
+    totals are read through the same header columns as the county rows.
+    """
+    results = {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        # Read all lines
+        lines = f.readlines()
+        
+        # Find the header row with party names or candidate names with party abbreviations
+        header_idx = 0
+        has_separate_party_row = False
+        
+        for i, line in enumerate(lines):
+            if 'Republican' in line or 'Democratic' in line:
+                header_idx = i
+                has_separate_party_row = True
+                break
+            elif '(R)' in line or '(D)' in line:  # Format like "JIM INHOFE (R)"
+                header_idx = i
+                has_separate_party_row = False
+                break
+        
+        candidates_info = []
+        
+        if has_separate_party_row:
+            # 2000 format: candidate names above, parties below
+            candidate_row_idx = header_idx - 1
+            candidate_reader = csv.reader([lines[candidate_row_idx]], skipinitialspace=True)
+            candidate_names = next(candidate_reader)
+            
+            party_reader = csv.reader([lines[header_idx]], skipinitialspace=True)
+            parties = next(party_reader)
+            
+            # Build candidate-party mapping
+            for i in range(1, len(candidate_names)):  # Skip first empty column
+                if candidate_names[i] and parties[i] and 'TOTAL' not in candidate_names[i].upper():
+                    # Map party abbreviations
+                    party_name = parties[i].strip()
+                    if 'Republican' in party_name:
+                        party = 'REP'
+                    elif 'Democratic' in party_name or 'Democrat' in party_name:
+                        party = 'DEM'
+                    elif 'Reform' in party_name or 'Independent' in party_name:
+                        party = 'IND'
+                    elif 'Libertarian' in party_name:
+                        party = 'LIB'
+                    else:
+                        party = party_name[:3].upper()
+                    
+                    candidate_name = candidate_names[i].replace('\n', ' ').replace('\r', ' ').strip()
+                    candidate_name = ' '.join(candidate_name.split())
+                    
+                    candidates_info.append({
+                        'index': i,
+                        'name': candidate_name,
+                        'party': party
+                    })
+            
+            data_start_idx = header_idx + 2
+        else:
+            # 2002 format: "CANDIDATE NAME (P)" all in one field (may span multiple lines in file)
+            # Use csv.reader to properly handle multi-line quoted fields
+            f_temp = open(filepath, 'r', encoding='utf-8')
+            csv_reader = csv.reader(f_temp, skipinitialspace=True)
+            
+            # Skip to header row
+            for _ in range(header_idx):
+                next(csv_reader)
+            
+            candidate_names = next(csv_reader)
+            f_temp.close()
+            
+            # Some 2002 headers start directly with candidates (02gov), others keep an
+            # empty county cell (02ltgov, 02ussen). Data rows always have county in
+            # column 0, so only the former need their candidates offset by +1
+            offset = 1 if candidate_names and candidate_names[0].strip() else 0
+            for i in range(len(candidate_names)):
+                if candidate_names[i] and 'TOTAL' not in candidate_names[i].upper():
+                    # Extract candidate name and party from format like "JIM INHOFE (R)"
+                    text = candidate_names[i].replace('\n', ' ').replace('\r', ' ').strip()
+                    text = ' '.join(text.split())
+                    
+                    match = re.search(r'([A-Za-z\s\.\']+)\(([A-Z])\)', text)
+                    if match:
+                        name = match.group(1).strip()
+                        party_abbr = match.group(2)
+                        
+                        # Normalize party abbreviations
+                        if party_abbr == 'R':
+                            party = 'REP'
+                        elif party_abbr == 'D':
+                            party = 'DEM'
+                        elif party_abbr == 'I':
+                            party = 'IND'
+                        elif party_abbr == 'L':
+                            party = 'LIB'
+                        else:
+                            party = party_abbr
+                        
+                        candidates_info.append({
+                            'index': i + offset,
+                            'name': name,
+                            'party': party
+                        })
+            
+            # Find where data rows start (after separator line)
+            data_start_idx = header_idx + 1
+            for i in range(header_idx, len(lines)):
+                if lines[i].strip() and not lines[i].strip().startswith('='):
+                    # Check if this looks like a data row (starts with a county name)
+                    test_row = next(csv.reader([lines[i]], skipinitialspace=True))
+                    if test_row and test_row[0] and test_row[0].strip() and not '=' in test_row[0]:
+                        data_start_idx = i
+                        break
+        
+        # Now parse data rows
+        for line in lines[data_start_idx:]:
+            if not line.strip():
+                continue
+            
+            row_data = next(csv.reader([line], skipinitialspace=True))
+            if not row_data or not row_data[0]:
+                continue
+            
+            county = row_data[0].strip()
+            
+            # State total row: keep the reported figures for reconciliation
+            if pipeline.is_total_row(county):
+                if reported_totals is not None:
+                    office_totals = reported_totals.setdefault(office_name, {})
+                    for cand_info in candidates_info:
+                        idx = cand_info['index']
+                        if idx < len(row_data):
+                            office_totals[cand_info['name']] = reference_clean_number(row_data[idx])
+                    # TOTAL VOTES is always the last column; comparing it with the sum of
+                    # the candidate columns catches candidates read from the wrong column
+                    fields = [field for field in row_data if field.strip()]
+                    if len(fields) > len(candidates_info) + 1:
+                        office_totals[pipeline.TOTAL_VOTES] = reference_clean_number(fields[-1])
+                continue
+            
+            county = reference_normalize_county_name(county, county_aliases)
+            
+            # Extract votes for each candidate
+            candidates_data = []
+            for cand_info in candidates_info:
+                idx = cand_info['index']
+                if idx < len(row_data):
+                    votes = reference_clean_number(row_data[idx])
+                    if votes > 0:
+                        candidates_data.append({
+                            'candidate': cand_info['name'],
+                            'party': cand_info['party'],
+                            'votes': votes
+                        })
+            
+            if candidates_data:
+                results[county] = candidates_data
+    
+    return results
+
+
+def reference_parse_2004_2008_format(filepath, year, county_aliases=None):
+    """Reference parser for 2004-2008 county files."""
+    results_by_office = defaultdict(lambda: defaultdict(list))
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            county = reference_normalize_county_name(row.get('county', ''), county_aliases)
+            office = row.get('office', '').strip()
+            candidate = row.get('candidate', '').strip()
+            party = row.get('party', '').strip()
+            votes = reference_clean_number(row.get('votes', 0))
+
+            if county and candidate and votes > 0:
+                results_by_office[office][county].append({
+                    'candidate': candidate,
+                    'party': party,
+                    'votes': votes
+                })
+
+    return results_by_office
+
+def reference_parse_modern_format(filepath, year, county_aliases=None):
+    """Reference parser for 2012+ county files."""
+    results_by_office = defaultdict(lambda: defaultdict(list))
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            county = reference_normalize_county_name(row.get('county', ''), county_aliases)
+            office = row.get('office', '').strip()
+            candidate = row.get('candidate', '').strip()
+            party = row.get('party', '').strip()
+            votes = reference_clean_number(row.get('votes', 0))
+
+            if county and candidate and office and votes > 0:
+                results_by_office[office][county].append({
+                    'candidate': candidate,
+                    'party': party,
+                    'votes': votes
+                })
+
+    return results_by_office
+
+def reference_parse_precinct_format(filepath, year, county_aliases=None):
+    """Reference parser for precinct files aggregated to counties."""
+    results_by_office = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+    candidate_party_map = {}
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            county = reference_normalize_county_name(row.get('county', ''), county_aliases)
+            office = row.get('office', '').strip()
+            candidate = row.get('candidate', '').strip()
+            party = row.get('party', '').strip()
+
+            if 'total_votes' in row:
+                votes = reference_clean_number(row.get('total_votes', 0))
+            else:
+                votes = reference_clean_number(row.get('votes', 0))
+
+            if county and candidate and office and votes > 0:
+                if 'over votes' in candidate.lower() or 'under votes' in candidate.lower():
+                    continue
+                if 'straight party' in office.lower():
+                    continue
+
+                results_by_office[office][county][candidate] += votes
+                if candidate not in candidate_party_map:
+                    candidate_party_map[candidate] = party
+
+    formatted_results = defaultdict(lambda: defaultdict(list))
+    for office, counties in results_by_office.items():
+        for county, candidates in counties.items():
+            for candidate, votes in candidates.items():
+                formatted_results[office][county].append({
+                    'candidate': candidate,
+                    'party': candidate_party_map.get(candidate, ''),
+                    'votes': votes
+                })
+
+    return formatted_results
+
+def with_reported_totals(parse):
+    """
+    Wrap a long-format reference parser, which keeps total rows as a county,
+    so those rows are moved into reported_totals ({office: {candidate: votes}})
+    instead of the results, as the pipeline's parsers do.
+    """
+    def parse_with_totals(filepath, year, county_aliases=None, reported_totals=None):
+        results_by_office = parse(filepath, year, county_aliases)
+        for office in list(results_by_office):
+            counties = results_by_office[office]
+            for county in [county for county in counties if pipeline.is_total_row(county)]:
+                for c in counties.pop(county):
+                    if reported_totals is not None:
+                        reported_totals.setdefault(office, {})[c['candidate']] = c['votes']
+            if not counties:
+                del results_by_office[office]
+        return results_by_office
+    return parse_with_totals
+
+REFERENCE_PARSERS = {
+    'old': reference_parse_old_format_csv,
+    '2004': with_reported_totals(reference_parse_2004_2008_format),
+    '2008': with_reported_totals(reference_parse_2004_2008_format),
+    'precinct': with_reported_totals(reference_parse_precinct_format),
+    'modern': with_reported_totals(reference_parse_modern_format),
+}
+
+# ---------------------------------------------------------------------------
+# Engines: callables (state config) -> results.
+# Register alternative engines (parallel, cached, streaming...) in ENGINES.
+# ---------------------------------------------------------------------------
+
+def reference_engine(state):
+    """
+    Build a state's results with the reference parsers and a pinned copy of the
+    pipeline's assembly loop, so changes to build_results itself (parallel,
+    cached, streaming...) are checked too. Only per-county leaf helpers
+    (process_county_results, create_contest_id, reconcile_totals,
+    attach_county_fips, build_metadata) are shared with the pipeline.
+    """
+    data_dir = state['data_dir']
+    county_aliases = state['county_aliases']
+    tolerance_pct = state.get('reconciliation_tolerance_pct', pipeline.DEFAULT_RECONCILIATION_TOLERANCE_PCT)
+    reconciliation = []
+    
+    county_fips = pipeline.load_county_fips(state['geometry_file'], county_aliases)
+    result = {
+        "metadata": pipeline.build_metadata(state, county_fips),
+        "results_by_year": {}
+    }
+    
+    for file_info in state['files']:
+        filename = file_info[0]
+        year = file_info[1]
+        office_override = file_info[2] if len(file_info) > 2 else None
+        format_type = file_info[3] if len(file_info) > 3 else 'modern'
+        
+        filepath = os.path.join(data_dir, filename)
+        
+        if not os.path.exists(filepath):
+            continue
+        
+        try:
+            # Initialize year if needed
+            if str(year) not in result['results_by_year']:
+                result['results_by_year'][str(year)] = {}
+            
+            if format_type == 'old':
+                # Old format - single office per file
+                reported_totals = {}
+                county_results = REFERENCE_PARSERS['old'](filepath, year, office_override, county_aliases,
+                                                          reported_totals=reported_totals)
+                reconciliation.extend(pipeline.reconcile_totals(filename, year, reported_totals,
+                                                                {office_override: county_results}, tolerance_pct))
+                
+                contest_id = pipeline.create_contest_id(office_override, year)
+                
+                # Create contest structure
+                if 'presidential' not in result['results_by_year'][str(year)] and 'president' in office_override.lower():
+                    result['results_by_year'][str(year)]['presidential'] = {}
+                elif 'governor' in office_override.lower():
+                    if 'gubernatorial' not in result['results_by_year'][str(year)]:
+                        result['results_by_year'][str(year)]['gubernatorial'] = {}
+                elif 'senate' in office_override.lower():
+                    if 'us_senate' not in result['results_by_year'][str(year)]:
+                        result['results_by_year'][str(year)]['us_senate'] = {}
+                
+                # Determine category
+                office_lower = office_override.lower()
+                if 'president' in office_lower:
+                    category = 'presidential'
+                elif 'lieutenant governor' in office_lower:
+                    category = 'lieutenant_governor'
+                elif 'governor' in office_lower:
+                    category = 'gubernatorial'
+                elif 'senate' in office_lower:
+                    category = 'us_senate'
+                else:
+                    category = 'other'
+                
+                if category not in result['results_by_year'][str(year)]:
+                    result['results_by_year'][str(year)][category] = {}
+                
+                # Process each county
+                contest_results = {}
+                for county, candidates in county_results.items():
+                    county_result = pipeline.process_county_results(county, candidates, year, office_override)
+                    if county_result:
+                        contest_results[county] = county_result
+                
+                result['results_by_year'][str(year)][category][contest_id] = {
+                    "contest_name": office_override.upper(),
+                    "results": contest_results
+                }
+                
+            else:
+                # Modern format (2004+)
+                reported_totals = {}
+                results_by_office = REFERENCE_PARSERS.get(format_type, REFERENCE_PARSERS['modern'])(
+                    filepath, year, county_aliases, reported_totals=reported_totals)
+                reconciliation.extend(pipeline.reconcile_totals(filename, year, reported_totals,
+                                                                results_by_office, tolerance_pct))
+                
+                # Define partisan offices we want to keep
+                partisan_offices = [
+                    'president',
+                    'u.s. senate', 'us senate',
+                    'governor',
+                    'lieutenant governor', 'lt governor', 'ltgov',
+                    'attorney general',
+                    'state auditor', 'auditor',
+                    'state treasurer', 'treasurer',
+                    'superintendent of public instruction', 'superintendent',
+                    'commissioner of labor', 'labor commissioner',
+                    'insurance commissioner',
+                    'corporation commissioner', 'corp commissioner'
+                ]
+                
+                for office, county_results in results_by_office.items():
+                    office_lower = office.lower()
+                    
+                    # Skip non-partisan races
+                    is_partisan = any(partisan_term in office_lower for partisan_term in partisan_offices)
+                    
+                    # Skip judicial, local, and proposition races
+                    if any(term in office_lower for term in ['supreme court', 'court of', 'judge', 'justice', 
+                                                               'proposition', 'state question', 'for county', 
+                                                               'for mayor', 'for council', 'city of', 'town of',
+                                                               'for board member', 'fire', 'ward', 'district no.']):
+                        continue
+                    
+                    if not is_partisan:
+                        continue
+                    
+                    contest_id = pipeline.create_contest_id(office, year)
+                    
+                    # Determine category
+                    if 'president' in office_lower:
+                        category = 'presidential'
+                    elif 'lieutenant' in office_lower or 'ltgov' in office_lower or 'lt gov' in office_lower:
+                        category = 'lieutenant_governor'
+                    elif 'governor' in office_lower and 'lieutenant' not in office_lower:
+                        category = 'gubernatorial'
+                    elif 'senate' in office_lower and ('u.s' in office_lower or 'us' in office_lower):
+                        category = 'us_senate'
+                    elif 'attorney general' in office_lower:
+                        category = 'attorney_general'
+                    elif 'auditor' in office_lower:
+                        category = 'state_auditor'
+                    elif 'treasurer' in office_lower:
+                        category = 'state_treasurer'
+                    elif 'superintendent' in office_lower:
+                        category = 'superintendent'
+                    elif 'labor' in office_lower:
+                        category = 'labor_commissioner'
+                    elif 'insurance' in office_lower:
+                        category = 'insurance_commissioner'
+                    elif 'corporation' in office_lower or 'corp' in office_lower:
+                        category = 'corporation_commissioner'
+                    else:
+                        continue  # Skip if we can't categorize it
+                    
+                    if category not in result['results_by_year'][str(year)]:
+                        result['results_by_year'][str(year)][category] = {}
+                    
+                    # Process each county
+                    contest_results = {}
+                    for county, candidates in county_results.items():
+                        county_result = pipeline.process_county_results(county, candidates, year, office)
+                        if county_result:
+                            contest_results[county] = county_result
+                    
+                    result['results_by_year'][str(year)][category][contest_id] = {
+                        "contest_name": office.upper(),
+                        "results": contest_results
+                    }
+        
+        except Exception as e:
+            print(f"   ✗ Error processing {filename}: {str(e)}")
+            traceback.print_exc(file=sys.stdout)
+            continue
+    
+    pipeline.attach_county_fips(result['results_by_year'], county_fips)
+    result['metadata']['reconciliation'] = {
+        "tolerance_pct": tolerance_pct,
+        "checked": len(reconciliation),
+        "failed": sum(1 for entry in reconciliation if not entry['within_tolerance']),
+        "entries": reconciliation
+    }
+    return result
+
+def current_engine(state):
+    return pipeline.build_results(state)
+
+ENGINES = {
+    'current': current_engine,
+}
+
+# ---------------------------------------------------------------------------
+# Comparison
+# ---------------------------------------------------------------------------
+
+def format_path(path):
+    """Render a key path, shortening results_by_year paths to year/category/contest/county."""
+    if path and path[0] == 'results_by_year':
+        path = tuple(p for p in path[1:] if p != 'results')
+    return '/'.join(str(p) for p in path) or '<root>'
+
+def compare_results(expected, actual, path=()):
+    """
+    Structurally compare two results trees.
+    Returns a list of human-readable differences, one per mismatching leaf or key.
+    """
+    if path in IGNORED_PATHS:
+        return []
+
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        diffs = []
+        for key in expected:
+            if key not in actual:
+                if path + (key,) not in IGNORED_PATHS:
+                    diffs.append(f"{format_path(path + (key,))}: missing")
+            else:
+                diffs.extend(compare_results(expected[key], actual[key], path + (key,)))
+        for key in actual:
+            if key not in expected and path + (key,) not in IGNORED_PATHS:
+                diffs.append(f"{format_path(path + (key,))}: unexpected")
+        return diffs
+
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        diffs = []
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            diffs.extend(compare_results(e, a, path + (i,)))
+        return diffs
+
+    if type(expected) is not type(actual) or expected != actual:
+        return [f"{format_path(path)}: expected {expected!r}, got {actual!r}"]
+    return []
+
+def run_engine(engine, state, repeat):
+    """Run an engine quietly; returns (result, best wall time in seconds)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = engine(state)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+# ---------------------------------------------------------------------------
+# Generated inputs
+# ---------------------------------------------------------------------------
+
+GENERATED_OFFICES = [
+    ('President', [('Alex Doe', 'DEM'), ('Sam Roe', 'REP'), ('Pat Poe', 'LIB')]),
+    ('U.S. Senate', [('Kim Lee', 'DEM'), ('Lee Kim', 'REP')]),
+    ('Governor', [('Ann Fox', 'DEM'), ('Bo Hill', 'REP'), ('Cy Dale', 'IND')]),
+    ('State Question 999', [('Yes', ''), ('No', '')]),
+]
+
+def format_votes(rng, votes):
+    """Render a vote count the way the source files do, including the messy cases."""
+    roll = rng.random()
+    if roll < 0.05:
+        return f"{votes:,}"
+    if roll < 0.08:
+        return f" {votes} "
+    if roll < 0.10:
+        return ''
+    return str(votes)
+
+def raw_county_name(rng, county, spellings):
+    """Spell a county the way source files might (mixed case, alias spellings)."""
+    if county in spellings and rng.random() < 0.5:
+        return rng.choice(spellings[county])
+    return rng.choice([county, county.title(), f" {county.title()}"])
+
+def generate_inputs(out_dir, state, seed, precincts_per_county=25):
+    """
+    Write synthetic 2004, modern and precinct files for a state's counties into out_dir.
+    Returns a copy of the state config pointing at the generated files.
+    """
+    rng = random.Random(seed)
+    counties = sorted(pipeline.load_county_fips(state['geometry_file'], state['county_aliases']))
+
+    # Exercise the alias table with the raw spellings it is meant to catch
+    spellings = defaultdict(list)
+    for alias, county in state['county_aliases'].items():
+        spellings[county].extend([alias, alias.title(), alias.lower(), f"{alias.title()} County"])
+
+    with open(os.path.join(out_dir, 'gen_2004.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['county', 'office', 'district', 'party', 'candidate', 'votes'])
+        state_totals = defaultdict(int)
+        for county in counties:
+            for office, candidates in GENERATED_OFFICES[:2]:
+                for candidate, party in candidates:
+                    votes = format_votes(rng, rng.randint(0, 60000))
+                    state_totals[office, party, candidate] += pipeline.clean_number(votes)
+                    writer.writerow([raw_county_name(rng, county, spellings), office, '', party, candidate, votes])
+        # Reported statewide totals, as in the 2004 president file
+        for (office, party, candidate), votes in state_totals.items():
+            writer.writerow(['STATE TOTAL:', office, '', party, candidate, f"{votes:,}"])
+
+    with open(os.path.join(out_dir, 'gen_modern.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['county', 'office', 'district', 'candidate', 'party',
+                         'absentee_mail', 'early_voting', 'election_day', 'votes'])
+        for county in counties:
+            for office, candidates in GENERATED_OFFICES:
+                for candidate, party in candidates:
+                    votes = rng.randint(0, 90000)
+                    writer.writerow([raw_county_name(rng, county, spellings), office, '', candidate, party,
+                                     votes // 10, votes // 5, votes - votes // 10 - votes // 5,
+                                     format_votes(rng, votes)])
+                if rng.random() < 0.1:
+                    writer.writerow([])
+
+    with open(os.path.join(out_dir, 'gen_precinct.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['county', 'office', 'candidate', 'party', 'precinct',
+                         'mail_votes', 'early_votes', 'elec_day_votes', 'total_votes', 'district'])
+        offices = GENERATED_OFFICES + [('Straight Party', [('Republican', 'REP')])]
+        for county in counties:
+            for precinct in range(precincts_per_county):
+                for office, candidates in offices:
+                    for candidate, party in candidates + [('Over Votes', ''), ('Under Votes', '')]:
+                        votes = rng.randint(0, 900)
+                        writer.writerow([raw_county_name(rng, county, spellings), office, candidate, party,
+                                         f"{precinct:06d}", '', '', '', format_votes(rng, votes), ''])
+
+    return dict(state, data_dir=out_dir, files=[
+        ('gen_2004.csv', 2004, None, '2004'),
+        ('gen_modern.csv', 2020, None, 'modern'),
+        ('gen_precinct.csv', 2014, None, 'precinct'),
+    ])
+
+# ---------------------------------------------------------------------------
+
+def load_golden(path):
+    """Load a golden results snapshot; None if there is none yet."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_golden(result, path):
+    """Write a golden results snapshot (compact; processed_date is ignored when comparing)."""
+    output_dir = os.path.dirname(path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, separators=(',', ':'), sort_keys=True)
+        f.write('\n')
+
+def report_diffs(name, seconds, reference_time, diffs, max_diffs, against='reference'):
+    """Print one engine's timing and differences."""
+    ratio = reference_time / seconds if seconds else float('inf')
+    status = '✓ identical' if not diffs else f'✗ {len(diffs)} differences'
+    print(f"   {name}: {seconds:.3f}s ({ratio:.2f}x reference) {status} vs {against}")
+    for diff in diffs[:max_diffs]:
+        print(f"      - {diff}")
+    if len(diffs) > max_diffs:
+        print(f"      ... {len(diffs) - max_diffs} more")
+
+def check(label, engines, state, repeat, max_diffs, golden=None):
+    """
+    Compare every engine against the reference on one input set, and the
+    reference and every engine against the golden output if one is given.
+    Returns True if all match.
+    """
+    print(f"\n{label}")
+    expected, reference_time = run_engine(reference_engine, state, repeat)
+    ok = True
+    if golden is None:
+        print(f"   reference: {reference_time:.3f}s")
+    else:
+        diffs = compare_results(golden, expected)
+        report_diffs('reference', reference_time, reference_time, diffs, max_diffs, 'golden')
+        ok = not diffs
+
+    for name in engines:
+        try:
+            actual, engine_time = run_engine(ENGINES[name], state, repeat)
+        except Exception as e:
+            print(f"   {name}: ✗ failed: {type(e).__name__}: {e}")
+            ok = False
+            continue
+        diffs = compare_results(expected, actual)
+        report_diffs(name, engine_time, reference_time, diffs, max_diffs)
+        ok = ok and not diffs
+        if golden is not None:
+            golden_diffs = compare_results(golden, actual)
+            report_diffs(name, engine_time, reference_time, golden_diffs, max_diffs, 'golden')
+            ok = ok and not golden_diffs
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--config', default=pipeline.DEFAULT_STATE_CONFIG,
+                        help='state config to check (default: %(default)s)')
+    parser.add_argument('--engine', action='append', choices=sorted(ENGINES),
+                        help='engine to check (default: all registered engines)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per engine; best time is kept')
+    parser.add_argument('--seed', type=int, default=2024, help='seed for generated inputs')
+    parser.add_argument('--max-diffs', type=int, default=20, help='differences to print per engine')
+    parser.add_argument('--skip-real', action='store_true', help='only check generated inputs')
+    parser.add_argument('--update-golden', action='store_true',
+                        help="rewrite the config's golden_file from the reference on the real files")
+    args = parser.parse_args()
+
+    engines = args.engine or sorted(ENGINES)
+    state = pipeline.load_state_config(args.config)
+    golden_file = state.get('golden_file')
+
+    if args.update_golden:
+        if not golden_file:
+            print(f"❌ {args.config} has no golden_file")
+            return 1
+        result, _ = run_engine(reference_engine, state, 1)
+        save_golden(result, golden_file)
+        print(f"💾 Golden output written to {golden_file} ({os.path.getsize(golden_file) / 1024:.2f} KB)")
+        return 0
+
+    print("Verifying election results pipeline...")
+    print("=" * 60)
+
+    ok = True
+    if not args.skip_real:
+        golden = load_golden(golden_file)
+        if golden is None:
+            print(f"⚠ No golden output for {state['state']} ({golden_file or 'golden_file not set'}); "
+                  f"run with --update-golden to create it")
+        ok &= check(f"📄 Real data ({state['data_dir']})", engines, state,
+                    args.repeat, args.max_diffs, golden)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        generated = generate_inputs(tmp_dir, state, args.seed)
+        ok &= check(f"🧪 Generated data (seed {args.seed})", engines, generated,
+                    args.repeat, args.max_diffs)
+
+    print("\n" + "=" * 60)
+    print("✅ All engines match the reference and golden output" if ok else "❌ Engines differ from the reference or golden output")
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())